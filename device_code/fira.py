@@ -43,8 +43,11 @@ def _maybe_reexec_in_venv() -> None:
         return
 
 
+_VIDEO_DEV_RE = re.compile(r"/dev/video(\d+)")
+
+
 def _parse_video_device(dev: str) -> int:
-    m = re.fullmatch(r"/dev/video(\d+)", (dev or "").strip())
+    m = _VIDEO_DEV_RE.fullmatch((dev or "").strip())
     if not m:
         raise argparse.ArgumentTypeError(f"Invalid --video-device {dev!r} (expected like /dev/video4)")
     return int(m.group(1))
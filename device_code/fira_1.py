@@ -1,7 +1,8 @@
+import atexit
 import shutil
 import serial
 import numpy as np
-from linuxpy.video.device import Device
+from linuxpy.video.device import Device, VideoCapture
 try:
     import cv2
 except ModuleNotFoundError as e:
@@ -13,12 +14,14 @@ import threading
 import time
 import os
 import glob
+import select
 import sys
 import errno
 import subprocess
 import fcntl
 from pathlib import Path
 from datetime import datetime
+from frame_writer import FrameWriter
 from runtime_commands import HeadlessCommandReader, command_from_keypress
 from usb_camera_serial import infer_serial_port_for_video_id
 
@@ -148,7 +151,12 @@ def _resolve_camera_id(requested_id: int, wait_s: float, fallbacks: list[int]) -
     )
 
 VideoSaveDir = os.environ.get("FIRA_VIDEO_SAVE_DIR", str(_default_home_dir() / "Camera_test" / "video"))
-ImageNameFormat = r"{frameId:08}.tiff"
+
+# Recording file format: tiff (default), png (16-bit, fast deflate) or npy (raw dump).
+RECORD_FORMAT = (os.environ.get("FIRA_RECORD_FORMAT") or "tiff").strip().lower()
+if RECORD_FORMAT not in ("tiff", "png", "npy"):
+    raise SystemExit(f"Invalid FIRA_RECORD_FORMAT {RECORD_FORMAT!r} (expected tiff, png or npy)")
+RECORD_SUFFIX = "." + RECORD_FORMAT
 
 # Disable GUI if no display is available.
 HEADLESS = _is_headless()
@@ -175,12 +183,25 @@ _COMMAND_KEY_MAP = {
 }
 
 
+# Serial commands, decoded once. The camera acknowledges each one by echoing it back.
+_CMD_NUC = bytes.fromhex("02182b003303")  # internal shutter
+_CMD_AUTO_FOCUS = bytes.fromhex("021838052503")
+_CMD_FOCUS_STOP = bytes.fromhex("021838002003")
+_CMD_FOCUS_PLUS = bytes.fromhex("021838012103")
+_CMD_FOCUS_MINUS = bytes.fromhex("021838012203")
+_CMD_AUTO_CALIBRATION_OFF = bytes.fromhex("021830002803")
+
+
+# cv2.pollKey (OpenCV >= 4.5) pumps GUI events without waitKey's minimum 1 ms sleep.
+_gui_poll_key = getattr(cv2, "pollKey", None) or (lambda: cv2.waitKey(1))
+
+
 def _poll_command(headless: bool, reader: HeadlessCommandReader | None) -> str | None:
     if headless:
         if reader is None:
             return None
         return reader.poll()
-    return command_from_keypress(cv2.waitKey(1), _COMMAND_KEY_MAP)
+    return command_from_keypress(_gui_poll_key(), _COMMAND_KEY_MAP)
 
 
 def _warn_unknown_command(command: str) -> None:
@@ -189,6 +210,63 @@ def _warn_unknown_command(command: str) -> None:
         flush=True,
     )
 
+
+def _process_frame(frame, state: dict, show: bool) -> np.ndarray:
+    """Turn one V4L2 frame into the byteswapped uint16 image and show it if `show`.
+
+    Kept at module scope so the per-frame path runs without closure lookups;
+    `state` carries the per-session settings resolved once in main().
+    Raises ValueError for frames that don't match the configured width.
+    A cv2.error from the display is reported and swallowed, so a display or
+    OpenCL failure skips that preview instead of failing the camera.
+    """
+    # The sensor sends big-endian samples.
+    raw = np.frombuffer(frame.data, dtype=">u2")
+    width = state["width"]
+    if width <= 0 or raw.size % width != 0:
+        raise ValueError(f"Unexpected frame size: {raw.size} uint16 values (width={width})")
+    height = raw.size // width
+    cropped = raw.reshape((height, width))[:, 1:]
+
+    # OpenCV ignores numpy byte order, so consumers need native uint16.
+    # Copying the big-endian view into a reused native buffer crops, swaps
+    # and makes it contiguous in one pass. The returned image is only valid
+    # until the next call.
+    raw_image = state["swapped"]
+    if raw_image is None or raw_image.shape != cropped.shape:
+        raw_image = state["swapped"] = np.empty(cropped.shape, dtype=np.uint16)
+    np.copyto(raw_image, cropped)
+
+    if show:
+        try:
+            if state["opencl"]:
+                # Runs on the OpenCL device; imshow takes the UMat directly.
+                image = cv2.normalize(cv2.UMat(raw_image), None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+            else:
+                image = state["display"]
+                if image is None or image.shape != raw_image.shape:
+                    image = state["display"] = np.empty(raw_image.shape, dtype=np.uint8)
+                cv2.normalize(raw_image, image, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+            cv2.imshow("FIRA1", image)
+        except cv2.error as e:
+            print(f"[fira_1] WARN: display failed: {e}", flush=True)
+    return raw_image
+
+
+def _newest_frame(cam, frames, frame):
+    """Skip frames already queued behind `frame` and return the newest one.
+
+    When display or disk falls behind, the driver queue holds stale frames;
+    draining it bounds latency to one frame period.
+    """
+    fd = cam.fileno()
+    while select.select((fd,), (), (), 0)[0]:
+        newer = next(frames, None)
+        if newer is None:
+            break
+        frame = newer
+    return frame
+
 def main():
     try:
         sys.stdout.reconfigure(line_buffering=True)
@@ -247,16 +325,13 @@ def main():
                 pass
         return s
 
-    def write_read_cmd(con, cmd_write, cmd_read):
+    def write_read_cmd(con, cmd_write: bytes, cmd_read: bytes) -> bool:
+        # A short or empty read (timeout) simply fails the bytes comparison.
         try:
-            con.write(bytearray.fromhex(cmd_write))
-            expected = int(len(cmd_read) / 2)
-            data = con.read(expected)
+            con.write(cmd_write)
+            return con.read(len(cmd_read)) == cmd_read
         except Exception:
             return False
-        if not data or len(data) != expected:
-            return False
-        return data.hex() == cmd_read
 
     def init(con):
         """
@@ -267,35 +342,22 @@ def main():
         ...
 
     def nuc(con):
-        cmd_write = '02182b003303'  # internal shutter
-        cmd_read =  '02182b003303'
-
-        return write_read_cmd(con, cmd_write, cmd_read)
+        return write_read_cmd(con, _CMD_NUC, _CMD_NUC)
         
     def autoFocus(con):
-        cmd_write = '021838052503'
-        cmd_read =  '021838052503'
-        return write_read_cmd(con, cmd_write, cmd_read)
+        return write_read_cmd(con, _CMD_AUTO_FOCUS, _CMD_AUTO_FOCUS)
         
     def focusStop(con):
-        cmd_write = '021838002003'
-        cmd_read =  '021838002003'
-        return write_read_cmd(con, cmd_write, cmd_read)
+        return write_read_cmd(con, _CMD_FOCUS_STOP, _CMD_FOCUS_STOP)
         
     def focusPlus(con):
-        cmd_write = '021838012103'
-        cmd_read =  '021838012103'
-        return write_read_cmd(con, cmd_write, cmd_read)
+        return write_read_cmd(con, _CMD_FOCUS_PLUS, _CMD_FOCUS_PLUS)
         
     def focusMinus(con):
-        cmd_write = '021838012203'
-        cmd_read =  '021838012203'
-        return write_read_cmd(con, cmd_write, cmd_read) 
+        return write_read_cmd(con, _CMD_FOCUS_MINUS, _CMD_FOCUS_MINUS)
     
     def autoCalicrationOff(con):
-        cmd_write = '021830002803'
-        cmd_read =  '021830002803'
-        return write_read_cmd(con, cmd_write, cmd_read)
+        return write_read_cmd(con, _CMD_AUTO_CALIBRATION_OFF, _CMD_AUTO_CALIBRATION_OFF)
 
     serial_connection = open_serial_connection(CAMERA_PORT, CAMERA_BAUD)
     init(serial_connection)
@@ -330,72 +392,128 @@ def main():
 
     command_reader = HeadlessCommandReader(_COMMAND_KEY_MAP.values()) if headless else None
 
+    frame_state = {
+        "width": int(os.environ.get("FIRA_FRAME_WIDTH", "640")),
+        "swapped": None,
+        "display": None,
+        "opencl": False,
+    }
+    # Opt-in: offload the display normalize to an OpenCL device (e.g. the iGPU).
+    if not headless and _env_flag("FIRA_OPENCL") == "1":
+        cv2.ocl.setUseOpenCL(True)
+        frame_state["opencl"] = cv2.ocl.useOpenCL()
+        if not frame_state["opencl"]:
+            print("[fira_1] NOTE: FIRA_OPENCL=1 but OpenCV has no usable OpenCL device; using CPU", flush=True)
+    # TIFF encoding and disk writes run off the capture thread; queued frames
+    # are flushed on exit.
+    frame_writer = FrameWriter(
+        max_pending=int(_env_flag("FIRA_WRITE_QUEUE") or "8"),
+        log_prefix="[fira_1]",
+    )
+    atexit.register(frame_writer.close)
+
+    # Two driver buffers, the same as linuxpy's own default. The writer blocks
+    # rather than drops, so the spare buffer absorbs short stalls there; live
+    # view stays current through the stale-frame skip below, not the queue depth.
+    # FIRA_V4L2_BUFFERS=1 shortens the queue. Frames the driver discards while
+    # recording show up as V4L2 sequence gaps and are reported per recording.
+    v4l2_buffers = max(1, int(_env_flag("FIRA_V4L2_BUFFERS") or "2"))
+
+    # Normalizing and blitting every frame is more than the eye needs at the
+    # camera rate; refresh the window on every Nth frame.
+    display_every = max(1, int(_env_flag("FIRA_DISPLAY_EVERY") or "2"))
+
+    # Live view prefers the newest frame; recording keeps every frame.
+    drop_stale_frames = _env_flag("FIRA_DROP_STALE_FRAMES") != "0"
+
+    missed_frames = 0
+
     last_err: Exception | None = None
     for vid in candidates:
         try:
-            with Device.from_id(int(vid)) as cam:
+            with Device.from_id(int(vid)) as cam, VideoCapture(cam, size=v4l2_buffers) as capture:
                 print(f"[fira_1] Using /dev/video{int(vid)}", flush=True)
-                for frameId, frame in enumerate(cam):
+                frames = iter(capture)
+                last_sequence = None
+                for frameId, frame in enumerate(frames):
+                    if drop_stale_frames and not doRecordVideo:
+                        frame = _newest_frame(cam, frames, frame)
+                    # frameId numbers the saved files contiguously, so driver-side
+                    # drops are only visible through the buffer sequence number.
+                    sequence = frame.frame_nb
+                    if doRecordVideo and last_sequence is not None and sequence > last_sequence + 1:
+                        if not missed_frames:
+                            print(
+                                f"[fira_1] WARN: driver dropped frames while recording; "
+                                f"try a larger FIRA_V4L2_BUFFERS (now {v4l2_buffers})",
+                                flush=True,
+                            )
+                        missed_frames += sequence - last_sequence - 1
+                    last_sequence = sequence
+                    show = not headless and frameId % display_every == 0
                     try:
-                        raw = np.frombuffer(frame.data, dtype=np.uint16)
-                        width = int(os.environ.get("FIRA_FRAME_WIDTH", "640"))
-                        if width <= 0 or raw.size % width != 0:
-                            raise ValueError(f"Unexpected frame size: {raw.size} uint16 values (width={width})")
-                        height = raw.size // width
-                        raw_image = raw.reshape((height, width))
-
-                        raw_image = raw_image[:, 1:]
-                        raw_image = raw_image.byteswap()
-
-                        if not headless:
-                            image = cv2.normalize(raw_image, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
-                            cv2.imshow("FIRA1", image)
+                        raw_image = _process_frame(frame, frame_state, show)
+                    except ValueError as e:
+                        print(e)
+                        print(time.time() - t_err)
+                        t_err = time.time()
+                        continue
 
-                        command = _poll_command(headless, command_reader)
-                        if command is not None and command not in _COMMAND_KEY_MAP.values():
-                            _warn_unknown_command(command)
-                            command = None
+                    # The GUI key poll also repaints the window, so it runs on display frames only.
+                    command = _poll_command(headless, command_reader) if (headless or show) else None
+                    if command is not None and command not in _COMMAND_KEY_MAP.values():
+                        _warn_unknown_command(command)
+                        command = None
 
+                    try:
                         if command == "v":
-                            doRecordVideo = not doRecordVideo
-                            if doRecordVideo:
+                            if not doRecordVideo:
                                 current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
                                 video_session_dir = os.path.join(
                                     VideoSaveDir,
                                     f"fira_cam{int(vid)}_session_{current_time}",
                                 )
                                 os.makedirs(video_session_dir, exist_ok=True)
+                                frame_path_prefix = os.path.join(video_session_dir, "")
+                                missed_frames = 0
+                                doRecordVideo = True
                                 print("FIRA 1 is now recording", flush=True)
                             else:
+                                doRecordVideo = False
                                 print("FIRA 1 STOPPED RECORDING", flush=True)
+                                if missed_frames:
+                                    print(
+                                        f"[fira_1] WARN: {missed_frames} frame(s) were dropped by the driver "
+                                        "during this recording and are missing from it",
+                                        flush=True,
+                                    )
 
                         if doRecordVideo:
-                            cv2.imwrite(
-                                os.path.join(video_session_dir, ImageNameFormat.format(frameId=frameId)),
+                            frame_writer.submit(
+                                f"{frame_path_prefix}{frameId:08}{RECORD_SUFFIX}",
                                 raw_image,
                             )
-                        else:
-                            if command == "n":
-                                nuc(serial_connection)
-                            if command == "r":
-                                shutil.rmtree(VideoSaveDir)
-                                os.makedirs(VideoSaveDir, exist_ok=True)
-                            if command == "a":
-                                autoFocus(serial_connection)
-                            if command == "A":
-                                focusStop(serial_connection)
-                            if command == "+":
-                                focusPlus(serial_connection)
-                            if command == "-":
-                                focusMinus(serial_connection)
-
-                        if command == "esc":
-                            return
-
-                    except Exception as e:
-                        print(e)
-                        print(time.time() - t_err)
-                        t_err = time.time()
+                        elif command == "r":
+                            shutil.rmtree(VideoSaveDir)
+                            os.makedirs(VideoSaveDir, exist_ok=True)
+                    except OSError as e:
+                        print(f"[fira_1] WARN: {e}", flush=True)
+
+                    # Serial helpers report failures through their return value.
+                    if not doRecordVideo:
+                        if command == "n":
+                            nuc(serial_connection)
+                        if command == "a":
+                            autoFocus(serial_connection)
+                        if command == "A":
+                            focusStop(serial_connection)
+                        if command == "+":
+                            focusPlus(serial_connection)
+                        if command == "-":
+                            focusMinus(serial_connection)
+
+                    if command == "esc":
+                        return
 
                 return
 
@@ -0,0 +1,129 @@
+import os
+import queue
+import threading
+
+import numpy as np
+
+try:
+    import cv2
+except ModuleNotFoundError as e:
+    raise SystemExit(
+        "Missing Python module 'cv2' (OpenCV). Install it (e.g. 'sudo apt-get install python3-opencv') "
+        "or run this script inside a virtualenv that has opencv-python installed."
+    ) from e
+
+
+# Per-extension encoder flags. TIFF is written uncompressed (OpenCV defaults
+# to LZW, which costs CPU per frame and gains little on noisy sensor data);
+# PNG uses the fastest deflate level.
+_TIFF_PARAMS = [cv2.IMWRITE_TIFF_COMPRESSION, 1]  # COMPRESSION_NONE
+_IMWRITE_PARAMS = {
+    ".tiff": _TIFF_PARAMS,
+    ".tif": _TIFF_PARAMS,
+    ".png": [cv2.IMWRITE_PNG_COMPRESSION, 1],
+}
+
+
+def write_frame(path: str, image: np.ndarray) -> bool:
+    """Write one frame, picking the encoder from the file extension.
+
+    .npy goes through np.save (header plus raw buffer, no codec); anything
+    else is encoded in memory with cv2.imencode and written with a single
+    write(), which skips the per-file stream setup cv2.imwrite does.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npy":
+        np.save(path, image, allow_pickle=False)
+        return True
+    ok, encoded = cv2.imencode(ext, image, _IMWRITE_PARAMS.get(ext, []))
+    if not ok:
+        return False
+    with open(path, "wb") as f:
+        f.write(encoded)
+    return True
+
+
+class FrameWriter:
+    """Write recorded frames to disk from background threads.
+
+    submit() copies the image, so callers may reuse their buffer right away.
+    By default the capture loop blocks once `max_pending` frames are waiting.
+    With `drop_when_full=True` the copies go into a pool of `max_pending`
+    reusable buffers instead, and a frame that finds no free buffer is dropped
+    (and counted) so capture never waits on the disk. With `workers` > 1
+    several frames are encoded at once (cv2.imencode and the file write both
+    release the GIL), so files may complete out of order.
+    """
+
+    def __init__(
+        self,
+        max_pending: int = 8,
+        log_prefix: str = "[frame_writer]",
+        drop_when_full: bool = False,
+        drop_log_every: int = 100,
+        workers: int = 1,
+    ):
+        max_pending = max(1, int(max_pending))
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._log_prefix = log_prefix
+        self._drop_when_full = bool(drop_when_full)
+        self._drop_log_every = max(1, int(drop_log_every))
+        self.dropped = 0
+        # Free buffers for drop_when_full mode. Slots start empty and are
+        # allocated on first use, so the pool only grows under a backlog.
+        self._free: queue.SimpleQueue = queue.SimpleQueue()
+        if self._drop_when_full:
+            for _ in range(max_pending):
+                self._free.put(None)
+        self._threads = [
+            threading.Thread(target=self._run, name=f"frame-writer-{i}", daemon=True)
+            for i in range(max(1, int(workers)))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, path: str, image: np.ndarray) -> bool:
+        """Queue one frame; returns False if it was dropped."""
+        if not self._drop_when_full:
+            self._queue.put((path, image.copy()))
+            return True
+        try:
+            buf = self._free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % self._drop_log_every == 0:
+                print(
+                    f"{self._log_prefix} WARN: writer backlog full, dropped {self.dropped} frame(s) so far",
+                    flush=True,
+                )
+            return False
+        if buf is None or buf.shape != image.shape or buf.dtype != image.dtype:
+            buf = np.empty_like(image)
+        np.copyto(buf, image)
+        # Never blocks: at most max_pending pool buffers exist.
+        self._queue.put_nowait((path, buf))
+        return True
+
+    def close(self) -> None:
+        """Write out everything already queued, then stop the threads."""
+        alive = [t for t in self._threads if t.is_alive()]
+        # One sentinel per thread; each worker exits on the first it takes.
+        for _ in alive:
+            self._queue.put(None)
+        for thread in alive:
+            thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            path, image = item
+            try:
+                if not write_frame(path, image):
+                    print(f"{self._log_prefix} WARN: failed to write {path}", flush=True)
+            except (cv2.error, OSError) as e:
+                print(f"{self._log_prefix} WARN: failed to write {path}: {e}", flush=True)
+            finally:
+                if self._drop_when_full:
+                    self._free.put(image)
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import argparse
+import sys
 from pathlib import Path
 from typing import Literal, Optional, Tuple
 
@@ -39,6 +40,13 @@ def _read_image(path: Path) -> np.ndarray:
     return img
 
 
+def _linear_lut(lo: float, hi: float) -> np.ndarray:
+    """Tabulate the clip-to-[lo, hi] and scale-to-0..255 map for every uint16 value."""
+    xs = np.clip(np.arange(65536, dtype=np.float32), lo, hi)
+    # Inputs are clipped to [lo, hi], so the rounded result is already in 0..255.
+    return ((xs - lo) * (255.0 / (hi - lo))).round().astype(np.uint8)
+
+
 def _scale_to_u8(
     img: np.ndarray,
     *,
@@ -55,7 +63,11 @@ def _scale_to_u8(
         raise SystemExit(f"Expected uint16 or uint8 input, got dtype={img.dtype}")
 
     if method == "shift":
-        return (img >> 8).astype(np.uint8)
+        # img >> 8 is the high byte of each (native-order) sample: pick it out
+        # of a byte view with one strided copy instead of a shift and a cast.
+        hi_byte = 1 if sys.byteorder == "little" else 0
+        img = np.ascontiguousarray(img)
+        return np.ascontiguousarray(img.view(np.uint8).reshape(*img.shape, 2)[..., hi_byte])
 
     if method == "clip":
         if clip_min is None or clip_max is None:
@@ -64,28 +76,24 @@ def _scale_to_u8(
         hi = int(clip_max)
         if not (0 <= lo < hi <= 65535):
             raise SystemExit("clip range must satisfy 0 <= clip-min < clip-max <= 65535")
-        clipped = np.clip(img, lo, hi)
-        out = ((clipped.astype(np.float32) - lo) * (255.0 / float(hi - lo))).round()
-        return np.clip(out, 0, 255).astype(np.uint8)
+        return _linear_lut(float(lo), float(hi))[img]
 
     if method == "percentile":
         lo_p = float(percent_lo)
         hi_p = float(percent_hi)
-        lo = float(np.percentile(img, lo_p))
-        hi = float(np.percentile(img, hi_p))
+        # One call partitions the image once for both ranks; two calls would
+        # copy and partition it twice.
+        lo, hi = (float(v) for v in np.percentile(img, (lo_p, hi_p)))
         if not (hi > lo):
             return np.zeros_like(img, dtype=np.uint8)
-        clipped = np.clip(img.astype(np.float32), lo, hi)
-        out = ((clipped - lo) * (255.0 / (hi - lo))).round()
-        return np.clip(out, 0, 255).astype(np.uint8)
+        return _linear_lut(lo, hi)[img]
 
     # method == "minmax"
     lo = int(img.min())
     hi = int(img.max())
     if hi <= lo:
         return np.zeros_like(img, dtype=np.uint8)
-    out = ((img.astype(np.float32) - float(lo)) * (255.0 / float(hi - lo))).round()
-    return np.clip(out, 0, 255).astype(np.uint8)
+    return _linear_lut(float(lo), float(hi))[img]
 
 
 def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
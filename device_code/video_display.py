@@ -1,8 +1,15 @@
-import cv2
+try:
+    import cv2
+except ModuleNotFoundError as e:
+    raise SystemExit(
+        "Missing Python module 'cv2' (OpenCV). Install it (e.g. 'sudo apt-get install python3-opencv') "
+        "or run this script inside a virtualenv that has opencv-python installed."
+    ) from e
 import numpy as np
-from PIL import Image
 import os
 import glob
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 # Directory path
 # base_path = '/home/ohad/I_W/Camera_Test/voxi/Video/session_20250929_123914' #voxi
@@ -31,25 +38,40 @@ if not tiff_files:
 
 print(f"Found {len(tiff_files)} TIFF files for video playback")
 
-# Function to convert 16-bit PIL image to 8-bit OpenCV format
-def pil_to_opencv_16bit(pil_image):
+# Conversion outputs are reused across frames so playback does not allocate
+# new 8-bit/BGR images for every file.
+_frame_buffers = {}
+
+
+def _reuse_buffer(name, shape):
+    buf = _frame_buffers.get(name)
+    if buf is None or buf.shape != shape:
+        buf = np.empty(shape, dtype=np.uint8)
+        _frame_buffers[name] = buf
+    return buf
+
+
+# Function to convert a 16-bit frame (as read by cv2.imread) to 8-bit BGR
+def u16_to_display_bgr(img_array):
     try:
-        # Convert PIL image to numpy array (16-bit)
-        img_array = np.array(pil_image, dtype=np.uint16)
-        
-        # Handle grayscale or RGB
-        if len(img_array.shape) == 2:  # Grayscale
-            # Normalize 16-bit (0-65535) to 8-bit (0-255)
-            img_array = cv2.normalize(img_array, None, 0, 255, cv2.NORM_MINMAX)
-            img_array = img_array.astype(np.uint8)
+        # Handle grayscale or color
+        if img_array.ndim == 2:  # Grayscale
+            # Normalize 16-bit (0-65535) straight to 8-bit (0-255)
+            u8 = _reuse_buffer("u8", img_array.shape)
+            cv2.normalize(img_array, u8, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
             # Convert to BGR for OpenCV display
-            img_array = cv2.cvtColor(img_array, cv2.COLOR_GRAY2BGR)
-        elif len(img_array.shape) == 3:  # RGB
-            # Normalize each channel to 8-bit
-            img_array = cv2.normalize(img_array, None, 0, 255, cv2.NORM_MINMAX)
-            img_array = img_array.astype(np.uint8)
-            # Convert RGB to BGR
-            img_array = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
+            bgr = _reuse_buffer("bgr", img_array.shape + (3,))
+            img_array = cv2.cvtColor(u8, cv2.COLOR_GRAY2BGR, dst=bgr)
+        elif img_array.ndim == 3 and img_array.shape[2] == 3:  # Color, already BGR from imread
+            # Normalize to 8-bit in one pass
+            bgr = _reuse_buffer("bgr", img_array.shape)
+            img_array = cv2.normalize(img_array, bgr, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+        elif img_array.ndim == 3 and img_array.shape[2] == 4:  # Color with alpha (BGRA from imread)
+            # Normalize to 8-bit, then drop the alpha channel for display
+            u8 = _reuse_buffer("u8_bgra", img_array.shape)
+            cv2.normalize(img_array, u8, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+            bgr = _reuse_buffer("bgr", img_array.shape[:2] + (3,))
+            img_array = cv2.cvtColor(u8, cv2.COLOR_BGRA2BGR, dst=bgr)
         else:
             raise ValueError("Unsupported image format")
         return img_array
@@ -57,6 +79,22 @@ def pil_to_opencv_16bit(pil_image):
         print(f"Error converting image: {e}")
         return None
 
+def read_frames(paths, workers=2, ahead=8):
+    """Yield (path, image) in order while the next `ahead` files decode in a thread pool."""
+    paths = iter(paths)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for path in paths:
+            pending.append((path, pool.submit(cv2.imread, path, cv2.IMREAD_UNCHANGED)))
+            if len(pending) >= ahead:
+                break
+        while pending:
+            path, future = pending.popleft()
+            next_path = next(paths, None)
+            if next_path is not None:
+                pending.append((next_path, pool.submit(cv2.imread, next_path, cv2.IMREAD_UNCHANGED)))
+            yield path, future.result()
+
 # Set frame rate for playback
 fps = 30
 delay = int(1000 / fps)  # Delay in milliseconds
@@ -65,15 +103,17 @@ delay = int(1000 / fps)  # Delay in milliseconds
 cv2.namedWindow("TIFF Video", cv2.WINDOW_NORMAL)
 
 # Display each TIFF as a video frame
-for frame_number, tiff_file in enumerate(tiff_files):
+# Files are decoded a few frames ahead so disk reads overlap with waitKey.
+for frame_number, (tiff_file, img_array) in enumerate(read_frames(tiff_files)):
     try:
         formatted_number = f"{frame_number + 121:06d}"  # Start from 000060
         print(f"Processing frame {formatted_number}: {os.path.basename(tiff_file)}")
-        tiff = Image.open(tiff_file)
-        if tiff.mode not in ('I;16', 'RGB'):
-            print(f"Warning: {tiff_file} is not 16-bit grayscale or RGB (mode: {tiff.mode})")
-        frame = pil_to_opencv_16bit(tiff)
-        tiff.close()
+        if img_array is None:
+            print(f"Skipping frame {formatted_number}: Failed to read")
+            continue
+        if img_array.dtype != np.uint16 and img_array.ndim == 2:
+            print(f"Warning: {tiff_file} is not 16-bit grayscale or RGB (dtype: {img_array.dtype})")
+        frame = u16_to_display_bgr(img_array)
         if frame is None:
             print(f"Skipping frame {formatted_number}: Failed to convert")
             continue
@@ -89,7 +129,6 @@ for frame_number, tiff_file in enumerate(tiff_files):
 
     except Exception as e:
         print(f"Error processing {tiff_file}: {e}")
-        tiff.close()
         continue
 
 # Clean up
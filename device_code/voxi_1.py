@@ -3,6 +3,7 @@ import errno
 import faulthandler
 import logging
 import os
+import queue
 import shutil
 import signal
 import sys
@@ -135,7 +136,7 @@ except Exception:
 import serial
 import numpy as np
 try:
-    from linuxpy.video.device import Device
+    from linuxpy.video.device import BufferType, Device, VideoCapture
 except ModuleNotFoundError as e:
     raise SystemExit(
         "Missing Python module 'linuxpy'. Install it (e.g. in a venv: 'python3 -m venv v && v/bin/pip install linuxpy') "
@@ -154,6 +155,7 @@ import shutil as _shutil
 from pathlib import Path
 from datetime import datetime
 from typing import Any
+from frame_writer import FrameWriter
 from runtime_commands import HeadlessCommandReader, command_from_keypress
 from usb_camera_serial import infer_serial_port_for_video_ids
 
@@ -184,7 +186,20 @@ def _v4l2ctl_get_fmt(devnode: str, *, timeout_s: float = 1.0) -> str:
     except Exception:
         return ""
 
-def get_video_devices(timeout_s: float = 2.0) -> dict[str, list[int]]:
+def _video_devices_from_linuxpy() -> dict[str, list[int]]:
+    """Map V4L2 card names to /dev/videoN ids via VIDIOC_QUERYCAP (in-process)."""
+    devices: dict[str, list[int]] = {}
+    for vid in _available_video_ids():
+        try:
+            with Device.from_id(vid) as dev:
+                card = dev.info.card
+        except Exception:
+            continue
+        devices.setdefault(card.strip(), []).append(vid)
+    return devices
+
+
+def _video_devices_from_v4l2_ctl(timeout_s: float) -> dict[str, list[int]]:
     if _shutil.which("v4l2-ctl") is None:
         return {}
 
@@ -203,38 +218,34 @@ def get_video_devices(timeout_s: float = 2.0) -> dict[str, list[int]]:
         return {}
 
     # Parse the output
-    lines = output.strip().split('\n')
-    devices = {}
+    devices: dict[str, list[int]] = {}
     current_device = None
-    device_paths = []
-
-    for line in lines:
+    for line in output.strip().split('\n'):
         if not line.startswith('\t'):  # New device
-            if current_device:
-                devices[current_device] = device_paths
             current_device = line.strip()
-            device_paths = []
-        else:
-            device_paths.append(line.strip())
-    
-    if current_device:
-        devices[current_device] = device_paths
+            devices.setdefault(current_device, [])
+            continue
+        p = line.strip()
+        if current_device is None or "/dev/video" not in p:
+            continue
+        try:
+            devices[current_device].append(int(os.path.basename(p)[5:]))
+        except Exception:
+            continue
+    return devices
+
+
+def get_video_devices(timeout_s: float = 2.0) -> dict[str, list[int]]:
+    # Query the driver directly; only shell out to v4l2-ctl if that finds nothing.
+    devices = _video_devices_from_linuxpy() or _video_devices_from_v4l2_ctl(timeout_s)
 
     # Filter and get the video device ids for specified names
     targets = ['SENSIA-CAM', '1080P USB FHD Camera']
     result_dict: dict[str, list[int]] = {}
 
     for name in targets:
-        for device_name, paths in devices.items():
+        for device_name, vids in devices.items():
             if device_name.startswith(name):
-                vids: list[int] = []
-                for p in paths:
-                    if "/dev/video" not in p:
-                        continue
-                    try:
-                        vids.append(int(os.path.basename(p).replace("video", "")))
-                    except Exception:
-                        continue
                 if vids:
                     result_dict[name] = sorted(set(vids))
                 break
@@ -319,39 +330,50 @@ def _is_headless() -> bool:
 
 def _available_video_ids() -> list[int]:
     ids: list[int] = []
-    for p in Path("/dev").glob("video*"):
-        name = p.name
-        if not name.startswith("video"):
-            continue
-        try:
-            ids.append(int(name.replace("video", "")))
-        except ValueError:
-            pass
+    try:
+        entries = os.scandir("/dev")
+    except OSError:
+        return []
+    with entries:
+        for entry in entries:
+            name = entry.name
+            if not name.startswith("video"):
+                continue
+            try:
+                ids.append(int(name[5:]))
+            except ValueError:
+                pass
     return sorted(set(ids))
 
 
 def _video_ids_from_sysfs_name(*needles: str) -> list[int]:
-    needles_l = [n.lower() for n in needles if (n or "").strip()]
-    if not needles_l:
+    needles_b = [n.strip().lower().encode() for n in needles if (n or "").strip()]
+    if not needles_b:
         return []
 
     ids: list[int] = []
-    base = Path("/sys/class/video4linux")
-    if not base.exists():
+    try:
+        entries = os.scandir(b"/sys/class/video4linux")
+    except OSError:
         return []
 
-    for vdir in base.glob("video*"):
-        try:
-            vid = int(vdir.name.replace("video", ""))
-        except ValueError:
-            continue
-        name_path = vdir / "name"
-        try:
-            vname = name_path.read_text(encoding="utf-8", errors="ignore").strip().lower()
-        except Exception:
-            continue
-        if any(n in vname for n in needles_l):
-            ids.append(vid)
+    # The sysfs name files are tiny; compare raw lowercase bytes instead of
+    # building Path objects and decoding each one.
+    with entries:
+        for entry in entries:
+            if not entry.name.startswith(b"video"):
+                continue
+            try:
+                vid = int(entry.name[5:])
+            except ValueError:
+                continue
+            try:
+                with open(os.path.join(entry.path, b"name"), "rb") as f:
+                    vname = f.read().strip().lower()
+            except OSError:
+                continue
+            if any(n in vname for n in needles_b):
+                ids.append(vid)
     return sorted(set(ids))
 
 
@@ -367,7 +389,7 @@ def _autodetect_product_camera_ids(product_name: str) -> list[int]:
     if sysfs_ids:
         return sorted(sysfs_ids)
 
-    # Next: v4l2-ctl mapping by product name.
+    # Next: card names via VIDIOC_QUERYCAP (v4l2-ctl only if that finds nothing).
     timeout_s = float(_env_flag("VOXI_V4L2_CTL_TIMEOUT_S") or "5")
     mapping = get_video_devices(timeout_s=timeout_s)
     ids = mapping.get(product_name) or []
@@ -388,31 +410,83 @@ def _pick_camera_ids2(product_name: str, *, allow_env: bool) -> list[int]:
 
 
 def _frame_to_u16_image(frame: Any, *, width: int, height: int) -> np.ndarray:
-    buf = frame.data
-    try:
-        # Some drivers occasionally return an odd byte count; trim to avoid
-        # "buffer size must be a multiple of element size" from numpy.
-        if len(buf) % 2 == 1:
-            buf = buf[:-1]
-    except Exception:
-        pass
-
-    raw = np.frombuffer(buf, dtype=np.uint16)
     needed = int(width) * int(height)
     if needed <= 0:
         raise ValueError(f"Invalid frame shape: width={width} height={height}")
-    if raw.size < needed:
+    buf = frame.data
+    available = len(buf) // 2
+    if available < needed:
         raise ValueError(
-            f"Frame too small: {raw.size} uint16 values (need {needed} for {height}x{width}). "
+            f"Frame too small: {available} uint16 values (need {needed} for {height}x{width}). "
             "This can indicate the wrong /dev/video* node was selected, or an intermittent USB/UVC short transfer."
         )
-    if raw.size != needed:
-        # Some drivers append metadata/padding; trim to expected size.
-        raw = raw[:needed]
-    return raw.reshape((int(height), int(width)))
+    # View the leading height*width samples in place. Some drivers append
+    # metadata/padding or return an odd byte count; the excess is ignored.
+    return np.ndarray((int(height), int(width)), dtype=np.uint16, buffer=buf)
+
+
+def _order_by_capture_format(camera_ids: list[int], *, width: int, height: int) -> list[int]:
+    """Move ids whose current capture format is width x height to the front.
+
+    Only VIDIOC_G_FMT is issued (no buffers, no STREAMON), so nodes that can't
+    produce the expected frame are tried last instead of streamed first.
+    Ids that can't be probed keep their place among the non-matching ones.
+    """
+    matching: list[int] = []
+    others: list[int] = []
+    for cid in camera_ids:
+        try:
+            with Device.from_id(int(cid)) as dev:
+                fmt = dev.get_format(BufferType.VIDEO_CAPTURE)
+        except Exception:
+            others.append(cid)
+            continue
+        if fmt.width == width and fmt.height == height:
+            matching.append(cid)
+        else:
+            others.append(cid)
+    return matching + others
 
 
-ImageNameFormat = r"{frameId:08}.tiff"
+def _make_frame_view(*, width: int, height: int):
+    """Return a frame -> uint16 image function bound to one fixed geometry.
+
+    The steady state is a single ndarray-over-buffer call; only a frame that
+    numpy rejects goes through _frame_to_u16_image for the descriptive error.
+    """
+    if int(width) <= 0 or int(height) <= 0:
+        raise ValueError(f"Invalid frame shape: width={width} height={height}")
+    shape = (int(height), int(width))
+
+    def view(frame: Any) -> np.ndarray:
+        try:
+            return np.ndarray(shape, dtype=np.uint16, buffer=frame.data)
+        except TypeError:
+            return _frame_to_u16_image(frame, width=width, height=height)
+
+    return view
+
+
+# Serial commands and their expected replies, parsed once.
+_CMD_NUC = bytes.fromhex("aa1685040010000000a7")
+_RESP_NUC = bytes.fromhex("551685000010")
+_CMD_SHUTTER_CLOSE = bytes.fromhex("aa18f401000049")
+_CMD_SHUTTER_OPEN = bytes.fromhex("aa18f401000148")
+_RESP_SHUTTER_SET = bytes.fromhex("5518f400009f")
+_CMD_SHUTTER_STATUS = bytes.fromhex("aa19f4000049")
+_RESP_SHUTTER_CLOSED = bytes.fromhex("5519f410000101000101171700160000000000000046")
+_RESP_SHUTTER_OPENED = bytes.fromhex("5519f410000102000001171701160000000000000045")
+_CMD_COMPENSATION_START = bytes.fromhex("aa08f000005e")
+_RESP_COMPENSATION_START = bytes.fromhex("5508f00000b3")
+# (command, expected reply) pairs sent in order by shutter_close/shutter_open.
+_SHUTTER_CLOSE_SEQUENCE = (
+    (_CMD_SHUTTER_CLOSE, _RESP_SHUTTER_SET),
+    (_CMD_SHUTTER_STATUS, _RESP_SHUTTER_CLOSED),
+)
+_SHUTTER_OPEN_SEQUENCE = (
+    (_CMD_SHUTTER_OPEN, _RESP_SHUTTER_SET),
+    (_CMD_SHUTTER_STATUS, _RESP_SHUTTER_OPENED),
+)
 
 
 _COMMAND_KEY_MAP = {
@@ -421,6 +495,7 @@ _COMMAND_KEY_MAP = {
     ord("r"): "r",
     27: "esc",
 }
+_SUPPORTED_COMMANDS = frozenset(_COMMAND_KEY_MAP.values())
 
 
 def _poll_command(headless: bool, reader: HeadlessCommandReader | None) -> str | None:
@@ -431,6 +506,62 @@ def _poll_command(headless: bool, reader: HeadlessCommandReader | None) -> str |
     return command_from_keypress(cv2.waitKey(1), _COMMAND_KEY_MAP)
 
 
+class _DisplayThread:
+    """Normalize and show frames on a worker thread, newest frame wins.
+
+    show() only swaps a reference into a one-slot mailbox, so the capture loop
+    never waits on HighGUI. Keypresses seen by the worker's waitKey come back
+    through poll_command(). Frames from frame_view are read-only views over
+    per-frame bytes, so handing them over needs no copy.
+    """
+
+    def __init__(self, window: str, shape: tuple[int, int]):
+        self._window = window
+        self._display = np.empty(shape, dtype=np.uint8)
+        self._cond = threading.Condition()
+        self._latest: np.ndarray | None = None
+        self._stopping = False
+        self._commands: queue.Queue = queue.Queue(maxsize=8)
+        self._thread = threading.Thread(target=self._run, name="voxi-display", daemon=True)
+        self._thread.start()
+
+    def show(self, image: np.ndarray) -> None:
+        with self._cond:
+            self._latest = image
+            self._cond.notify()
+
+    def poll_command(self) -> str | None:
+        try:
+            return self._commands.get_nowait()
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout=1.0)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._latest is None and not self._stopping:
+                    # Wake periodically anyway so waitKey keeps the window responsive.
+                    self._cond.wait(timeout=0.02)
+                if self._stopping:
+                    return
+                image, self._latest = self._latest, None
+            if image is not None:
+                cv2.normalize(image, self._display, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+                cv2.imshow(self._window, self._display)
+            command = command_from_keypress(cv2.waitKey(1), _COMMAND_KEY_MAP)
+            if command is not None:
+                try:
+                    self._commands.put_nowait(command)
+                except queue.Full:
+                    pass
+
+
 def _warn_unknown_command(command: str) -> None:
     _log(f"[voxi_1] WARN: unknown command {command!r}. Supported commands: v n r esc")
 
@@ -499,18 +630,15 @@ def main():
                 pass
         return s
 
-    def write_read_cmd(con, cmd_write, cmd_read):
+    def write_read_cmd(con, cmd_write: bytes, cmd_read: bytes) -> bool:
+        # A short or empty read (timeout) simply fails the bytes comparison.
         try:
-            con.write(bytearray.fromhex(cmd_write))
-            expected = int(len(cmd_read) / 2)
-            data = con.read(expected)
+            con.write(cmd_write)
+            data = con.read(len(cmd_read))
         except Exception as e:
             print(f"[voxi_1] WARN: serial IO error: {e}", flush=True)
             return False
-
-        if not data or len(data) != expected:
-            return False
-        return data.hex() == cmd_read
+        return data == cmd_read
 
     def init(con):
         # Avoid hanging forever if the camera doesn't respond on serial.
@@ -528,35 +656,25 @@ def main():
         return
 
     def nuc(con):
-        cmd_write = 'aa1685040010000000a7'
-        cmd_read = '551685000010'
-        return write_read_cmd(con, cmd_write, cmd_read)
+        return write_read_cmd(con, _CMD_NUC, _RESP_NUC)
     
     def shutter_close_simple(con):
-        cmd_write = 'aa18f401000148'
-        cmd_read = '5518f400009f'
-        return write_read_cmd(con, cmd_write, cmd_read)
+        return write_read_cmd(con, _CMD_SHUTTER_OPEN, _RESP_SHUTTER_SET)
         
     def shutter_close(con):
-        cmd_write_list = ['aa18f401000049', 'aa19f4000049']
-        cmd_read_list = ['5518f400009f', '5519f410000101000101171700160000000000000046']
-        for (cmd_write, cmd_read) in zip(cmd_write_list, cmd_read_list):
+        for (cmd_write, cmd_read) in _SHUTTER_CLOSE_SEQUENCE:
             status = write_read_cmd(con, cmd_write, cmd_read)
             if not status: return False
         return True
         
     def shutter_open(con):
-        cmd_write_list = ['aa18f401000148', 'aa19f4000049']
-        cmd_read_list = ['5518f400009f', '5519f410000102000001171701160000000000000045']
-        for (cmd_write, cmd_read) in zip(cmd_write_list, cmd_read_list):
+        for (cmd_write, cmd_read) in _SHUTTER_OPEN_SEQUENCE:
             status = write_read_cmd(con, cmd_write, cmd_read)
             if not status: return False
         return True
         
     def compensation_start(con):
-        cmd_write = 'aa08f000005e'
-        cmd_read = '5508f00000b3'
-        return write_read_cmd(con, cmd_write, cmd_read)
+        return write_read_cmd(con, _CMD_COMPENSATION_START, _RESP_COMPENSATION_START)
 
     def scs(con):
         while not shutter_close(con):
@@ -578,9 +696,29 @@ def main():
         os.makedirs(video_save_dir, exist_ok=True)
     
     doRecordVideo = False
+    missed_frames = 0
+    rejected_frames = 0
+    writer_drops_at_start = 0
 
     frame_width = int(_env_flag("VOXI_FRAME_WIDTH") or "640")
     frame_height = int(_env_flag("VOXI_FRAME_HEIGHT") or "480")
+    frame_view = _make_frame_view(width=frame_width, height=frame_height)
+    # Reused as the cv2.normalize destination so display does not allocate per frame.
+    display_image = np.empty((frame_height, frame_width), dtype=np.uint8)
+
+    # Recording never blocks the capture loop: each frame is copied into one of
+    # VOXI_WRITE_QUEUE (default 64) reusable buffers and encoded by
+    # VOXI_WRITER_THREADS (default 2) writer threads. When every buffer is still
+    # waiting on the disk, the frame is skipped rather than recorded; the writer
+    # counts these drops and logs the running total. Anything already queued is
+    # written out at exit.
+    frame_writer = FrameWriter(
+        max_pending=int(_env_flag("VOXI_WRITE_QUEUE") or "64"),
+        log_prefix="[voxi_1]",
+        drop_when_full=True,
+        workers=int(_env_flag("VOXI_WRITER_THREADS") or "2"),
+    )
+    atexit.register(frame_writer.close)
 
     if not headless:
         _set_stage("gui_init")
@@ -598,6 +736,19 @@ def main():
 
     command_reader = HeadlessCommandReader(_COMMAND_KEY_MAP.values()) if headless else None
 
+    def show_inline(image: np.ndarray) -> None:
+        cv2.normalize(image, display_image, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+        cv2.imshow("VOXI 1", display_image)
+
+    # Opt-in: run normalize/imshow/waitKey on their own thread so the GUI never
+    # paces the capture loop. Off by default since some HighGUI backends expect
+    # all window calls on the thread that created the window.
+    display_thread: _DisplayThread | None = None
+    if not headless and _env_flag("VOXI_DISPLAY_THREAD") == "1":
+        display_thread = _DisplayThread("VOXI 1", (frame_height, frame_width))
+        atexit.register(display_thread.close)
+    show_frame = display_thread.show if display_thread is not None else show_inline
+
     # How many consecutive bad frames to tolerate before considering the stream unstable.
     # With multiple UVC cameras on USB2, short bursts can happen; default is intentionally higher.
     max_bad_frames = int(_env_flag("VOXI_MAX_BAD_FRAMES") or "30")
@@ -615,11 +766,21 @@ def main():
     reopen_retries = int(_env_flag("VOXI_REOPEN_RETRIES") or "2")
     reopen_sleep_s = float(_env_flag("VOXI_REOPEN_SLEEP_S") or "0.5")
 
+    # voxi_1 shows every frame it dequeues and has no stale-frame skip, so each
+    # extra driver buffer is another frame of live-view lag; default to one.
+    # Frames the driver discards while recording are counted from the V4L2
+    # sequence numbers and reported when recording stops, so a camera that needs
+    # slack shows up there and VOXI_V4L2_BUFFERS can be raised for it.
+    v4l2_buffers = max(1, int(_env_flag("VOXI_V4L2_BUFFERS") or "1"))
+
     # Try candidate camera nodes until one streams frames that match the expected shape.
     last_open_err: Exception | None = None
     fmt_diag_done: set[int] = set()
     _set_stage("video_open")
-    for cid in (camera_ids or [0]):
+    candidate_ids = camera_ids or [0]
+    if len(candidate_ids) > 1:
+        candidate_ids = _order_by_capture_format(candidate_ids, width=frame_width, height=frame_height)
+    for cid in candidate_ids:
         devnode = f"/dev/video{int(cid)}"
         try:
             reopen_attempt = 0
@@ -631,17 +792,32 @@ def main():
                     total_frames = 0
                     total_bad = 0
                     last_stats_t = time.monotonic()
+                    last_sequence = None
 
-                    with Device.from_id(int(cid)) as cam:
+                    with Device.from_id(int(cid)) as cam, VideoCapture(cam, size=v4l2_buffers) as capture:
                         print(f"[voxi_1] Using {devnode}", flush=True)
                         _set_stage("streaming")
-                        for frameId, frame in enumerate(cam):
+                        for frameId, frame in enumerate(capture):
                             total_frames += 1
+                            # Files are numbered by frameId, so frames the driver discarded
+                            # only show up as gaps in its sequence counter.
+                            sequence = frame.frame_nb
+                            if doRecordVideo and last_sequence is not None and sequence > last_sequence + 1:
+                                if not missed_frames:
+                                    print(
+                                        f"[voxi_1] WARN: driver dropped frames while recording; "
+                                        f"try a larger VOXI_V4L2_BUFFERS (now {v4l2_buffers})",
+                                        flush=True,
+                                    )
+                                missed_frames += sequence - last_sequence - 1
+                            last_sequence = sequence
                             try:
-                                raw_image = _frame_to_u16_image(frame, width=frame_width, height=frame_height)
+                                raw_image = frame_view(frame)
                                 bad_frames = 0
                                 consecutive_bad = 0
-                            except Exception as e:
+                            except ValueError as e:
+                                if doRecordVideo:
+                                    rejected_frames += 1
                                 # Many cameras/drivers can emit a short/truncated buffer right
                                 # at stream start. Ignore warmup failures completely.
                                 if warmup_frames > 0 and int(frameId) < int(warmup_frames):
@@ -690,42 +866,64 @@ def main():
                                         )
 
                             if doRecordVideo:
-                                cv2.imwrite(
-                                    os.path.join(video_session_dir, ImageNameFormat.format(frameId=frameId)),
-                                    raw_image,
-                                )
-                                if frameId % 20 and not headless:
-                                    image = cv2.normalize(raw_image, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
-                                    cv2.imshow("VOXI 1", image)
+                                frame_writer.submit(f"{frame_path_prefix}{frameId:08}.tiff", raw_image)
+                                # Preview only every 20th frame while recording.
+                                if not headless and frameId % 20 == 0:
+                                    show_frame(raw_image)
                             else:
                                 if not headless:
-                                    image = cv2.normalize(raw_image, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
-                                    cv2.imshow("VOXI 1", image)
+                                    show_frame(raw_image)
 
-                            command = _poll_command(headless, command_reader)
-                            if command is not None and command not in _COMMAND_KEY_MAP.values():
+                            if display_thread is not None:
+                                command = display_thread.poll_command()
+                            else:
+                                command = _poll_command(headless, command_reader)
+                            if command is None:
+                                continue
+                            if command not in _SUPPORTED_COMMANDS:
                                 _warn_unknown_command(command)
-                                command = None
+                                continue
 
+                            # Only the filesystem calls are guarded: a full or missing disk
+                            # must not be mistaken for a camera failure by the outer handlers.
                             if command == "v":
-                                doRecordVideo = not doRecordVideo
-                                if doRecordVideo:
+                                if not doRecordVideo:
                                     current_time = datetime.now().strftime("%Y%m%d_%H%M%S")
                                     video_session_dir = os.path.join(video_save_dir, f"voxi1_session_{current_time}")
-                                    os.makedirs(video_session_dir, exist_ok=True)
+                                    try:
+                                        os.makedirs(video_session_dir, exist_ok=True)
+                                    except OSError as e:
+                                        _log(f"[voxi_1] WARN: cannot start recording: {e}")
+                                        continue
+                                    frame_path_prefix = os.path.join(video_session_dir, "")
+                                    missed_frames = 0
+                                    rejected_frames = 0
+                                    writer_drops_at_start = frame_writer.dropped
+                                    doRecordVideo = True
                                     print("VOXI 1 is now recording", flush=True)
                                 else:
+                                    doRecordVideo = False
                                     print("VOXI 1 STOPPED RECORDING", flush=True)
-
-                            if not doRecordVideo:
+                                    writer_drops = frame_writer.dropped - writer_drops_at_start
+                                    lost_frames = missed_frames + rejected_frames + writer_drops
+                                    if lost_frames:
+                                        print(
+                                            f"[voxi_1] WARN: this recording is missing {lost_frames} frame(s): "
+                                            f"{missed_frames} dropped by the driver, {rejected_frames} rejected as short "
+                                            f"or truncated, {writer_drops} skipped by the writer",
+                                            flush=True,
+                                        )
+                            elif command == "esc":
+                                return
+                            elif not doRecordVideo:
                                 if command == "n":
                                     nuc(serial_connection)
-                                if command == "r":
-                                    shutil.rmtree(video_save_dir)
-                                    os.makedirs(video_save_dir, exist_ok=True)
-
-                            if command == "esc":
-                                return
+                                elif command == "r":
+                                    try:
+                                        shutil.rmtree(video_save_dir)
+                                        os.makedirs(video_save_dir, exist_ok=True)
+                                    except OSError as e:
+                                        _log(f"[voxi_1] WARN: cannot reset {video_save_dir!r}: {e}")
 
                         # If the iterator ends, stop trying other ids.
                         return